@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import time
+from pymongo import UpdateOne
+
+import server
+
+async def backfill_customer_orders(batch_size: int):
+    # Idempotent: $setOnInsert never overwrites a summary the API already maintains,
+    # so this can be re-run safely while the API is serving traffic.
+    db = server.db
+    await server.ensure_indexes()
+    started = time.perf_counter()
+    print("🔁 Backfilling customer_orders from orders...")
+
+    scanned = upserted = 0
+    ops = []
+    async for order in db.orders.find({}, {"_id": 0}).batch_size(batch_size):
+        summary = server.customer_order_summary(order)
+        ops.append(UpdateOne(
+            {"mobile_hash": summary["mobile_hash"], "order_id": summary["order_id"]},
+            {"$setOnInsert": summary},
+            upsert=True
+        ))
+        scanned += 1
+        if len(ops) >= batch_size:
+            result = await db.customer_orders.bulk_write(ops, ordered=False)
+            upserted += result.upserted_count
+            ops = []
+    if ops:
+        result = await db.customer_orders.bulk_write(ops, ordered=False)
+        upserted += result.upserted_count
+
+    print(f"✅ Scanned {scanned} orders, added {upserted} customer_orders summaries")
+    print(f"⏱️  Backfill finished in {time.perf_counter() - started:.1f}s")
+    server.client.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Populate customer_orders for orders placed before the index existed."
+    )
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Orders per bulk_write call")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_customer_orders(parse_args().batch_size))
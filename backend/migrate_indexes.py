@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import time
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+import server
+
+async def find_conflicting_indexes(collection: str) -> list:
+    # An existing index on the same key with different options (e.g. the unique {id: 1}
+    # from the earlier layout) makes create_indexes fail for the whole collection.
+    existing = await server.db[collection].index_information()
+    conflicts = []
+    for index in server.INDEXES[collection]:
+        spec = index.document
+        for name, info in existing.items():
+            if list(info["key"]) == list(spec["key"].items()) and bool(info.get("unique")) != bool(spec.get("unique")):
+                conflicts.append(name)
+    return conflicts
+
+async def report_duplicates(collection: str, limit: int):
+    # Print the key values blocking each unique index so they can be cleaned up by hand.
+    for index in server.INDEXES[collection]:
+        spec = index.document
+        if not spec.get("unique"):
+            continue
+        fields = list(spec["key"])
+        groups = await server.db[collection].aggregate([
+            {"$group": {"_id": {f: f"${f}" for f in fields}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": limit},
+        ], allowDiskUse=True).to_list(limit)
+        for group in groups:
+            print(f"   ⚠️  {collection} {group['_id']} appears {group['count']} times")
+
+async def migrate_indexes(apply: bool, duplicate_limit: int):
+    db = server.db
+    started = time.perf_counter()
+    print("🔁 Migrating indexes to the current layout..." if apply else "🔍 Checking indexes (dry run, pass --apply to change them)...")
+
+    failed = 0
+    for collection in server.INDEXES:
+        conflicts = await find_conflicting_indexes(collection)
+        for name in conflicts:
+            print(f"🗑️  {collection}.{name}: options differ from the current layout" + ("; dropping" if apply else ""))
+            if apply:
+                await db[collection].drop_index(name)
+        if not apply:
+            await report_duplicates(collection, duplicate_limit)
+            continue
+        # One at a time so a unique index blocked by duplicates does not stop the rest
+        # (including the replacement for anything just dropped) from being built.
+        ok = True
+        for index in server.INDEXES[collection]:
+            try:
+                await db[collection].create_indexes([index])
+            except DuplicateKeyError as e:
+                ok = False
+                print(f"❌ {collection}: duplicate keys block {dict(index.document['key'])} ({e})")
+            except OperationFailure as e:
+                ok = False
+                print(f"❌ {collection}: could not create {dict(index.document['key'])} ({e})")
+        if ok:
+            print(f"✅ {collection}: indexes up to date")
+        else:
+            failed += 1
+            await report_duplicates(collection, duplicate_limit)
+
+    print(f"⏱️  Index migration finished in {time.perf_counter() - started:.1f}s ({failed} collections failed)")
+    server.client.close()
+    return failed
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Drop indexes left over from older layouts and rebuild the current ones."
+    )
+    parser.add_argument("--apply", action="store_true",
+                        help="Drop conflicting indexes and build the missing ones (default: report only)")
+    parser.add_argument("--duplicate-limit", type=int, default=20,
+                        help="Duplicate key groups to print per collection")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    raise SystemExit(1 if asyncio.run(migrate_indexes(args.apply, args.duplicate_limit)) else 0)
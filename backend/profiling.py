@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# ============ REQUEST PROFILING ============
+
+class ProfilingSettings:
+    # Shared between the admin routes and the middleware; mutated in place.
+    def __init__(self, output_dir: Path, interval: float = 0.001, max_files: int = 200):
+        self.enabled = False
+        self.sample_rate = 0.0  # percent of requests, 0-100
+        self.output_dir = output_dir
+        self.interval = interval
+        self.max_files = max_files
+
+class ProfilingMiddleware:
+    """Samples requests through pyinstrument and writes speedscope (flame graph) JSON.
+
+    Pure ASGI so the disabled path is a single attribute check.
+    """
+
+    def __init__(self, app, settings: ProfilingSettings):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send):
+        settings = self.settings
+        if (
+            not settings.enabled
+            or scope["type"] != "http"
+            or random.random() * 100 >= settings.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Imported lazily: pyinstrument is only needed once profiling is switched on
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=settings.interval, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                await asyncio.to_thread(write_profile, settings, profiler, scope, duration_ms)
+            except Exception:
+                logger.exception("Failed to write request profile")
+
+def write_profile(settings: ProfilingSettings, profiler, scope, duration_ms: float):
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    settings.output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    name = f"{timestamp}_{scope['method']}_{path}_{duration_ms:.0f}ms.speedscope.json"
+    (settings.output_dir / name).write_text(profiler.output(renderer=SpeedscopeRenderer()))
+
+    profiles = sorted(settings.output_dir.glob("*.speedscope.json"))
+    for old in profiles[:-settings.max_files]:
+        old.unlink(missing_ok=True)
+
+def list_profiles(settings: ProfilingSettings) -> list:
+    if not settings.output_dir.exists():
+        return []
+    return [
+        {"name": p.name, "size_bytes": p.stat().st_size}
+        for p in sorted(settings.output_dir.glob("*.speedscope.json"), reverse=True)
+    ]
+
+# ============ EVENT LOOP LAG MONITOR ============
+
+class LoopLagMonitor:
+    """Detects callbacks that block the event loop and logs the loop thread's stack.
+
+    A coroutine on the loop records a heartbeat every `interval` seconds. A watchdog
+    thread notices when the next heartbeat is overdue by more than `threshold` (the
+    loop is stuck in a callback) and logs the loop thread's current stack once per stall.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = None):
+        self.threshold = threshold
+        # Beat well inside the threshold so an idle loop never looks stalled
+        self.interval = interval if interval is not None else min(0.05, threshold / 4)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+        }
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - before - self.interval)
+            self._last_beat = now
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._last_beat
+            # The next beat is only due `interval` after the last one
+            lag = time.monotonic() - beat - self.interval
+            if lag < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms+; loop thread stack:\n{stack}")
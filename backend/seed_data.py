@@ -1,8 +1,12 @@
+import argparse
 import asyncio
+import itertools
 from motor.motor_asyncio import AsyncIOMotorClient
 from passlib.context import CryptContext
+import random
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -12,7 +16,48 @@ load_dotenv(ROOT_DIR / '.env')
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-async def seed_database():
+COLLECTIONS = ["users", "restaurants", "tables", "menu_items", "orders", "half_order_sessions", "customer_orders"]
+
+RESTAURANT_MENU = [
+    # Starters
+    {"name": "Paneer Tikka", "category": "Starters", "full_price": 250, "half_price": 150, "description": "Grilled cottage cheese with Indian spices"},
+    {"name": "Chicken 65", "category": "Starters", "full_price": 280, "half_price": 160, "description": "Spicy fried chicken from South India"},
+    {"name": "Veg Spring Rolls", "category": "Starters", "full_price": 180, "half_price": 100, "description": "Crispy rolls with vegetable filling"},
+    {"name": "Fish Tikka", "category": "Starters", "full_price": 320, "half_price": 180, "description": "Marinated fish grilled to perfection"},
+
+    # Main Course
+    {"name": "Butter Chicken", "category": "Main Course", "full_price": 350, "half_price": 200, "description": "Creamy tomato-based chicken curry"},
+    {"name": "Dal Makhani", "category": "Main Course", "full_price": 220, "half_price": 130, "description": "Rich black lentils cooked overnight"},
+    {"name": "Biryani (Chicken)", "category": "Main Course", "full_price": 280, "half_price": None, "description": "Fragrant rice with spiced chicken"},
+    {"name": "Biryani (Veg)", "category": "Main Course", "full_price": 230, "half_price": None, "description": "Fragrant rice with mixed vegetables"},
+    {"name": "Palak Paneer", "category": "Main Course", "full_price": 240, "half_price": 140, "description": "Cottage cheese in spinach gravy"},
+
+    # Breads
+    {"name": "Butter Naan", "category": "Breads", "full_price": 50, "half_price": None, "description": "Soft leavened bread with butter"},
+    {"name": "Garlic Naan", "category": "Breads", "full_price": 60, "half_price": None, "description": "Naan topped with garlic"},
+    {"name": "Tandoori Roti", "category": "Breads", "full_price": 40, "half_price": None, "description": "Whole wheat flatbread"},
+
+    # Desserts
+    {"name": "Gulab Jamun", "category": "Desserts", "full_price": 120, "half_price": 70, "description": "Sweet milk dumplings in syrup"},
+    {"name": "Rasmalai", "category": "Desserts", "full_price": 140, "half_price": 80, "description": "Cottage cheese in sweet milk"},
+
+    # Beverages
+    {"name": "Masala Chai", "category": "Beverages", "full_price": 40, "half_price": None, "description": "Indian spiced tea"},
+    {"name": "Lassi (Sweet)", "category": "Beverages", "full_price": 80, "half_price": None, "description": "Yogurt-based drink"},
+    {"name": "Fresh Lime Soda", "category": "Beverages", "full_price": 60, "half_price": None, "description": "Refreshing lime drink"},
+]
+
+BAR_MENU = [
+    {"name": "Mojito", "category": "Cocktails", "full_price": 180, "half_price": None, "description": "Refreshing mint cocktail"},
+    {"name": "Long Island Iced Tea", "category": "Cocktails", "full_price": 280, "half_price": None, "description": "Strong mixed cocktail"},
+    {"name": "Beer (Kingfisher)", "category": "Beer", "full_price": 150, "half_price": None, "description": "Premium Indian beer"},
+    {"name": "Whiskey (Single)", "category": "Spirits", "full_price": 200, "half_price": 120, "description": "Premium whiskey shot"},
+    {"name": "Vodka (Single)", "category": "Spirits", "full_price": 180, "half_price": 110, "description": "Premium vodka shot"},
+    {"name": "Chicken Wings", "category": "Snacks", "full_price": 280, "half_price": 160, "description": "Spicy fried chicken wings"},
+    {"name": "Nachos", "category": "Snacks", "full_price": 220, "half_price": 130, "description": "Tortilla chips with cheese"},
+]
+
+async def seed_database(args=None):
     # Connect to MongoDB
     mongo_url = os.environ['MONGO_URL']
     client = AsyncIOMotorClient(mongo_url)
@@ -20,14 +65,16 @@ async def seed_database():
     
     print("🌱 Seeding database...")
     
-    # Clear existing data (optional - comment out if you want to keep existing data)
-    await db.users.delete_many({})
-    await db.restaurants.delete_many({})
-    await db.tables.delete_many({})
-    await db.menu_items.delete_many({})
-    await db.orders.delete_many({})
-    await db.half_order_sessions.delete_many({})
-    print("✅ Cleared existing data")
+    # Clear existing data (optional - comment out if you want to keep existing data).
+    # Dropping is much faster than delete_many on large datasets, but it also drops the
+    # indexes, so recreate the API's index layout straight away.
+    for collection in COLLECTIONS:
+        await db[collection].drop()
+    # Imported here so plain imports of this module don't build the API's client and app
+    import server
+    await server.ensure_indexes()
+    server.client.close()
+    print("✅ Cleared existing data and recreated indexes")
     
     # Create Super Admin
     admin_id = str(uuid.uuid4())
@@ -117,34 +164,7 @@ async def seed_database():
     print(f"✅ Created 5 tables for bar")
     
     # Create Menu Items for Restaurant
-    menu_items = [
-        # Starters
-        {"name": "Paneer Tikka", "category": "Starters", "full_price": 250, "half_price": 150, "description": "Grilled cottage cheese with Indian spices"},
-        {"name": "Chicken 65", "category": "Starters", "full_price": 280, "half_price": 160, "description": "Spicy fried chicken from South India"},
-        {"name": "Veg Spring Rolls", "category": "Starters", "full_price": 180, "half_price": 100, "description": "Crispy rolls with vegetable filling"},
-        {"name": "Fish Tikka", "category": "Starters", "full_price": 320, "half_price": 180, "description": "Marinated fish grilled to perfection"},
-        
-        # Main Course
-        {"name": "Butter Chicken", "category": "Main Course", "full_price": 350, "half_price": 200, "description": "Creamy tomato-based chicken curry"},
-        {"name": "Dal Makhani", "category": "Main Course", "full_price": 220, "half_price": 130, "description": "Rich black lentils cooked overnight"},
-        {"name": "Biryani (Chicken)", "category": "Main Course", "full_price": 280, "half_price": None, "description": "Fragrant rice with spiced chicken"},
-        {"name": "Biryani (Veg)", "category": "Main Course", "full_price": 230, "half_price": None, "description": "Fragrant rice with mixed vegetables"},
-        {"name": "Palak Paneer", "category": "Main Course", "full_price": 240, "half_price": 140, "description": "Cottage cheese in spinach gravy"},
-        
-        # Breads
-        {"name": "Butter Naan", "category": "Breads", "full_price": 50, "half_price": None, "description": "Soft leavened bread with butter"},
-        {"name": "Garlic Naan", "category": "Breads", "full_price": 60, "half_price": None, "description": "Naan topped with garlic"},
-        {"name": "Tandoori Roti", "category": "Breads", "full_price": 40, "half_price": None, "description": "Whole wheat flatbread"},
-        
-        # Desserts
-        {"name": "Gulab Jamun", "category": "Desserts", "full_price": 120, "half_price": 70, "description": "Sweet milk dumplings in syrup"},
-        {"name": "Rasmalai", "category": "Desserts", "full_price": 140, "half_price": 80, "description": "Cottage cheese in sweet milk"},
-        
-        # Beverages
-        {"name": "Masala Chai", "category": "Beverages", "full_price": 40, "half_price": None, "description": "Indian spiced tea"},
-        {"name": "Lassi (Sweet)", "category": "Beverages", "full_price": 80, "half_price": None, "description": "Yogurt-based drink"},
-        {"name": "Fresh Lime Soda", "category": "Beverages", "full_price": 60, "half_price": None, "description": "Refreshing lime drink"},
-    ]
+    menu_items = RESTAURANT_MENU
     
     for item_data in menu_items:
         item = {
@@ -163,15 +183,7 @@ async def seed_database():
     print(f"✅ Created {len(menu_items)} menu items for restaurant")
     
     # Create Menu Items for Bar
-    bar_menu_items = [
-        {"name": "Mojito", "category": "Cocktails", "full_price": 180, "half_price": None, "description": "Refreshing mint cocktail"},
-        {"name": "Long Island Iced Tea", "category": "Cocktails", "full_price": 280, "half_price": None, "description": "Strong mixed cocktail"},
-        {"name": "Beer (Kingfisher)", "category": "Beer", "full_price": 150, "half_price": None, "description": "Premium Indian beer"},
-        {"name": "Whiskey (Single)", "category": "Spirits", "full_price": 200, "half_price": 120, "description": "Premium whiskey shot"},
-        {"name": "Vodka (Single)", "category": "Spirits", "full_price": 180, "half_price": 110, "description": "Premium vodka shot"},
-        {"name": "Chicken Wings", "category": "Snacks", "full_price": 280, "half_price": 160, "description": "Spicy fried chicken wings"},
-        {"name": "Nachos", "category": "Snacks", "full_price": 220, "half_price": 130, "description": "Tortilla chips with cheese"},
-    ]
+    bar_menu_items = BAR_MENU
     
     for item_data in bar_menu_items:
         item = {
@@ -198,7 +210,325 @@ async def seed_database():
     print(f"\n🍺 Bar: {bar['name']}")
     print(f"   QR Code URL (Table B1): {bar_tables[0]['qr_url']}")
     
+    if args is not None and args.restaurants > 0:
+        await generate_synthetic_data(db, args)
+    
     client.close()
 
+# ============ SYNTHETIC DATA GENERATOR ============
+
+# Relative order volume per hour of day (local time): lunch and dinner peaks.
+HOUR_WEIGHTS = [
+    1, 0.5, 0.2, 0.1, 0.1, 0.2, 0.5, 1.5, 3, 3.5, 3, 4,
+    8, 10, 8, 4, 3, 4, 6, 10, 12, 10, 6, 3,
+]
+# Fri/Sat/Sun are busier than weekdays (Monday == 0).
+WEEKDAY_WEIGHTS = [0.8, 0.8, 0.85, 0.9, 1.2, 1.5, 1.4]
+HOUR_CUM_WEIGHTS = list(itertools.accumulate(HOUR_WEIGHTS))
+HALF_SESSION_MINUTES = 30
+
+def chunked(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def insert_and_release(collection, batch, semaphore):
+    try:
+        await collection.insert_many(batch, ordered=False)
+    finally:
+        semaphore.release()
+
+async def insert_batched(collection, docs, batch_size, concurrency):
+    """Insert docs with unordered insert_many, keeping at most `concurrency` batches in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    inserted = 0
+    for batch in chunked(docs, batch_size):
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(insert_and_release(collection, batch, semaphore)))
+        inserted += len(batch)
+    await asyncio.gather(*tasks)
+    return inserted
+
+def random_order_time(rng, now, days):
+    """Pick a timestamp within the last `days` days following the hour/weekday profile."""
+    while True:
+        day = now - timedelta(days=rng.randrange(days))
+        if rng.random() * max(WEEKDAY_WEIGHTS) > WEEKDAY_WEIGHTS[day.weekday()]:
+            continue
+        hour = rng.choices(range(24), cum_weights=HOUR_CUM_WEIGHTS)[0]
+        ts = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+        if ts <= now:
+            return ts
+
+def pick_order_status(rng, age):
+    if age < timedelta(hours=2):
+        return rng.choices(["OPEN", "PREPARING", "SERVED", "CANCELLED"], weights=[35, 40, 20, 5])[0]
+    return rng.choices(["SERVED", "CANCELLED"], weights=[92, 8])[0]
+
+def pick_session_status(rng, age):
+    if age < timedelta(minutes=HALF_SESSION_MINUTES):
+        return rng.choices(["ACTIVE", "MATCHED"], weights=[60, 40])[0]
+    return rng.choices(["MATCHED", "EXPIRED"], weights=[55, 45])[0]
+
+def build_restaurants(rng, args, frontend_url, now):
+    restaurants, tables, menu_items, users = [], [], [], []
+    # One shared hash: bcrypt is deliberately slow and would dominate generation time.
+    counter_hash = pwd_context.hash("counter123")
+    for i in range(args.restaurants):
+        restaurant_id = str(uuid.uuid4())
+        kind = "bar" if rng.random() < 0.25 else "restaurant"
+        created_at = (now - timedelta(days=args.days + rng.randrange(365))).isoformat()
+        restaurants.append({
+            "id": restaurant_id,
+            "name": f"{'Bar' if kind == 'bar' else 'Restaurant'} {i + 1:05d}",
+            "address": f"{rng.randrange(1, 999)} Synthetic Street, Bangalore, Karnataka",
+            "phone": f"+91 9{rng.randrange(10**8, 10**9)}",
+            "type": kind,
+            "created_at": created_at,
+        })
+        users.append({
+            "id": str(uuid.uuid4()),
+            "username": f"counter_{i + 1:05d}",
+            "password_hash": counter_hash,
+            "role": "counter",
+            "restaurant_id": restaurant_id,
+            "created_at": created_at,
+        })
+        table_count = max(1, int(rng.gauss(args.tables_per_restaurant, args.tables_per_restaurant / 4)))
+        for t in range(1, table_count + 1):
+            table_id = str(uuid.uuid4())
+            tables.append({
+                "id": table_id,
+                "restaurant_id": restaurant_id,
+                "table_number": f"{'B' if kind == 'bar' else 'T'}{t}",
+                "qr_url": f"{frontend_url}/menu/{restaurant_id}/{table_id}",
+                "is_active": rng.random() > 0.02,
+                "created_at": created_at,
+            })
+        template = BAR_MENU if kind == "bar" else RESTAURANT_MENU
+        for item_data in rng.sample(template, k=max(3, int(len(template) * rng.uniform(0.6, 1.0)))):
+            menu_items.append({
+                "id": str(uuid.uuid4()),
+                "restaurant_id": restaurant_id,
+                "name": item_data["name"],
+                "category": item_data["category"],
+                "full_price": item_data["full_price"],
+                "half_price": item_data.get("half_price"),
+                "description": item_data["description"],
+                "is_available": rng.random() > 0.05,
+                "created_at": created_at,
+            })
+    return restaurants, tables, menu_items, users
+
+def generate_orders(rng, args, now, tables_by_restaurant, menu_by_restaurant, sessions):
+    """Yield order documents; half-order sessions are appended to `sessions` as a side effect."""
+    restaurant_ids = list(tables_by_restaurant)
+    # Heavy-tailed popularity so a few restaurants get most of the traffic.
+    popularity = list(itertools.accumulate(rng.paretovariate(1.2) for _ in restaurant_ids))
+    halvable_by_restaurant = {
+        rid: [m for m in menu if m["half_price"]] for rid, menu in menu_by_restaurant.items()
+    }
+    # Returning customers: a fixed pool with Zipf-like reuse.
+    customer_count = max(1, args.orders // 4)
+    session_window = timedelta(minutes=HALF_SESSION_MINUTES)
+    generated = 0
+
+    def customer():
+        n = min(int(rng.paretovariate(1.1)) - 1, customer_count - 1)
+        idx = n if rng.random() < 0.5 else rng.randrange(customer_count)
+        return f"Customer {idx}", f"9{idx:09d}"
+
+    while generated < args.orders:
+        restaurant_id = rng.choices(restaurant_ids, cum_weights=popularity)[0]
+        tables = tables_by_restaurant[restaurant_id]
+        menu = menu_by_restaurant[restaurant_id]
+        halvable = halvable_by_restaurant[restaurant_id]
+        table = rng.choice(tables)
+        created_at = random_order_time(rng, now, args.days)
+        age = now - created_at
+        name, mobile = customer()
+
+        items = [
+            {"menu_item_id": m["id"], "name": m["name"], "portion": "full", "price": m["full_price"]}
+            for m in rng.sample(menu, k=min(len(menu), rng.choice([1, 1, 2, 2, 3, 4])))
+        ]
+        is_half_order = bool(halvable) and rng.random() < args.half_order_ratio
+        order = {
+            "id": str(uuid.uuid4()),
+            "restaurant_id": restaurant_id,
+            "table_id": table["id"],
+            "table_number": table["table_number"],
+            "customer_name": name,
+            "customer_mobile": mobile,
+            "items": items,
+            "total_amount": 0,
+            "status": pick_order_status(rng, age),
+            "is_half_order": is_half_order,
+            "session_id": None,
+            "matched_order_id": None,
+            "matched_table_number": None,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(minutes=rng.randrange(1, 90)) if age > timedelta(hours=2) else created_at,
+        }
+
+        partner = None
+        if is_half_order:
+            half_item = rng.choice(halvable)
+            session = {
+                "id": str(uuid.uuid4()),
+                "restaurant_id": restaurant_id,
+                "menu_item_id": half_item["id"],
+                "menu_item_name": half_item["name"],
+                "table_id": table["id"],
+                "table_number": table["table_number"],
+                "customer_name": name,
+                "customer_mobile": mobile,
+                "order_id": order["id"],
+                "created_at": created_at,
+                "expires_at": created_at + session_window,
+                "status": pick_session_status(rng, age),
+            }
+            if session["status"] == "MATCHED" and generated + 2 > args.orders:
+                # No room left for the partner order; leave the session unmatched instead
+                # so --orders is never exceeded.
+                session["status"] = "ACTIVE" if age < session_window else "EXPIRED"
+            sessions.append(session)
+            items.append({
+                "menu_item_id": half_item["id"],
+                "name": half_item["name"],
+                "portion": "half",
+                "price": half_item["half_price"],
+                "session_id": session["id"],
+            })
+            order["session_id"] = session["id"]
+            if session["status"] == "ACTIVE":
+                order["status"] = "OPEN"
+            elif session["status"] == "EXPIRED":
+                order["status"] = "EXPIRED"
+                order["updated_at"] = session["expires_at"]
+            else:
+                joined_at = created_at + timedelta(seconds=rng.randrange(30, HALF_SESSION_MINUTES * 60))
+                joined_at = min(joined_at, now)
+                partner_table = rng.choice(tables)
+                partner_name, partner_mobile = customer()
+                partner = {
+                    "id": str(uuid.uuid4()),
+                    "restaurant_id": restaurant_id,
+                    "table_id": partner_table["id"],
+                    "table_number": partner_table["table_number"],
+                    "customer_name": partner_name,
+                    "customer_mobile": partner_mobile,
+                    "items": [{
+                        "menu_item_id": half_item["id"],
+                        "name": half_item["name"],
+                        "portion": "half",
+                        "price": half_item["half_price"],
+                        "session_id": session["id"],
+                    }],
+                    "total_amount": half_item["half_price"],
+                    "status": "MATCHED" if age < timedelta(hours=2) else "SERVED",
+                    "is_half_order": True,
+                    "session_id": session["id"],
+                    "matched_order_id": order["id"],
+                    "matched_table_number": table["table_number"],
+                    "created_at": joined_at,
+                    "updated_at": joined_at,
+                }
+                order["status"] = partner["status"]
+                order["matched_order_id"] = partner["id"]
+                order["matched_table_number"] = partner_table["table_number"]
+                order["updated_at"] = joined_at
+
+        order["total_amount"] = sum(item["price"] for item in items)
+        yield order
+        generated += 1
+        if partner is not None:
+            yield partner
+            generated += 1
+
+async def generate_synthetic_data(db, args):
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+    started = time.perf_counter()
+    print(f"\n🏭 Generating synthetic data (seed={args.seed})...")
+
+    restaurants, tables, menu_items, users = build_restaurants(rng, args, frontend_url, now)
+    await asyncio.gather(
+        insert_batched(db.restaurants, restaurants, args.batch_size, args.concurrency),
+        insert_batched(db.users, users, args.batch_size, args.concurrency),
+        insert_batched(db.tables, tables, args.batch_size, args.concurrency),
+        insert_batched(db.menu_items, menu_items, args.batch_size, args.concurrency),
+    )
+    print(f"✅ Created {len(restaurants)} restaurants, {len(tables)} tables, {len(menu_items)} menu items")
+
+    tables_by_restaurant, menu_by_restaurant = {}, {}
+    for table in tables:
+        tables_by_restaurant.setdefault(table["restaurant_id"], []).append(table)
+    for item in menu_items:
+        menu_by_restaurant.setdefault(item["restaurant_id"], []).append(item)
+
+    # Sessions and customer_orders summaries are derived from each order. All three
+    # collections are flushed in batches, each with its own `concurrency` bound.
+    from server import customer_order_summary
+    semaphores = {name: asyncio.Semaphore(args.concurrency) for name in ("orders", "half_order_sessions", "customer_orders")}
+    buffers = {name: [] for name in semaphores}
+    counts = {name: 0 for name in semaphores}
+    tasks = []
+
+    async def flush(name, force=False):
+        docs = buffers[name]
+        if not docs or (len(docs) < args.batch_size and not force):
+            return
+        batch = docs[:]
+        docs.clear()
+        counts[name] += len(batch)
+        await semaphores[name].acquire()
+        tasks.append(asyncio.create_task(insert_and_release(db[name], batch, semaphores[name])))
+
+    orders = generate_orders(rng, args, now, tables_by_restaurant, menu_by_restaurant, buffers["half_order_sessions"])
+    for order in orders:
+        buffers["orders"].append(order)
+        buffers["customer_orders"].append(customer_order_summary(order))
+        for name in buffers:
+            await flush(name)
+    for name in buffers:
+        await flush(name, force=True)
+    await asyncio.gather(*tasks)
+    order_count, session_count = counts["orders"], counts["half_order_sessions"]
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Created {order_count} orders and {session_count} half-order sessions")
+    print(f"⏱️  Synthetic data generated in {elapsed:.1f}s")
+    print("   Counter users: counter_00001 ... (password: counter123)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Seed the demo data and optionally generate a large synthetic dataset."
+    )
+    parser.add_argument("--restaurants", type=int, default=0,
+                        help="Number of synthetic restaurants/bars to generate (0 = demo data only)")
+    parser.add_argument("--tables-per-restaurant", type=int, default=12,
+                        help="Mean tables per synthetic restaurant")
+    parser.add_argument("--orders", type=int, default=100000,
+                        help="Total synthetic orders, including matched half-order partners")
+    parser.add_argument("--half-order-ratio", type=float, default=0.15,
+                        help="Fraction of orders that open a half-order session")
+    parser.add_argument("--days", type=int, default=90,
+                        help="Spread order timestamps over this many past days")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Documents per insert_many call")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Concurrent insert_many batches per collection")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Random seed for reproducible datasets")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    asyncio.run(seed_database(parse_args()))
@@ -1,10 +1,20 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import OperationFailure
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import hmac
+import importlib.util
 import os
 import logging
+import time
+from collections import OrderedDict
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional
@@ -12,23 +22,74 @@ import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
+from profiling import LoopLagMonitor, ProfilingMiddleware, ProfilingSettings, list_profiles
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '10'))
+client = AsyncIOMotorClient(
+    mongo_url,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+)
 db = client[os.environ['DB_NAME']]
 
+# Startup / cache settings
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '60'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '2000'))
+WARMUP_RESTAURANT_LIMIT = int(os.environ.get('WARMUP_RESTAURANT_LIMIT', '200'))
+STARTUP_RETRY_SECONDS = float(os.environ.get('STARTUP_RETRY_SECONDS', '2'))
+MONGO_SHARDING = os.environ.get('MONGO_SHARDING', 'false').lower() == 'true'
+# Re-send changes this far behind updated_since: a summary's updated_at is stamped
+# before the write lands, so it can trail the server_time of a poll that raced it.
+CUSTOMER_DELTA_OVERLAP = timedelta(seconds=float(os.environ.get('CUSTOMER_DELTA_OVERLAP_SECONDS', '10')))
+
+# Profiling / diagnostics
+profiling_settings = ProfilingSettings(
+    output_dir=Path(os.environ.get('PROFILE_DIR', ROOT_DIR / 'profiles')),
+    interval=float(os.environ.get('PROFILE_INTERVAL_SECONDS', '0.001')),
+    max_files=int(os.environ.get('PROFILE_MAX_FILES', '200'))
+)
+PROFILING_SYNC_SECONDS = float(os.environ.get('PROFILING_SYNC_SECONDS', '5'))
+LOOP_LAG_THRESHOLD_MS = float(os.environ.get('LOOP_LAG_THRESHOLD_MS', '0'))  # 0 disables the monitor
+loop_monitor = LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD_MS / 1000) if LOOP_LAG_THRESHOLD_MS > 0 else None
+
 # Security
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
+# Keep this separate from SECRET_KEY: changing it orphans every customer_orders entry
+CUSTOMER_HASH_KEY = os.environ.get('CUSTOMER_HASH_KEY', SECRET_KEY).encode()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so /healthz answers while Mongo is still coming up;
+    # /readyz stays 503 until warm_up() has finished.
+    app.state.ready = False
+    if 'CUSTOMER_HASH_KEY' not in os.environ:
+        logger.warning(
+            "CUSTOMER_HASH_KEY is not set; falling back to SECRET_KEY. Rotating SECRET_KEY "
+            "would then orphan all customer order history - set a dedicated key."
+        )
+    warmup_task = asyncio.create_task(warm_up(app))
+    profiling_sync_task = asyncio.create_task(sync_profiling_settings())
+    cache_sweep_task = asyncio.create_task(sweep_cache_periodically())
+    if loop_monitor is not None:
+        loop_monitor.start()
+    yield
+    warmup_task.cancel()
+    profiling_sync_task.cancel()
+    cache_sweep_task.cancel()
+    if loop_monitor is not None:
+        loop_monitor.stop()
+    client.close()
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 # ============ MODELS ============
@@ -144,11 +205,31 @@ class OrderCreate(BaseModel):
     customer_mobile: str
     items: List[dict]  # [{menu_item_id, name, portion, price}]
 
+class CustomerOrderSummary(BaseModel):
+    id: str
+    restaurant_id: str
+    table_number: str
+    items: List[dict]
+    total_amount: float
+    status: str
+    matched_table_number: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class CustomerOrderHistory(BaseModel):
+    orders: List[CustomerOrderSummary]
+    server_time: datetime  # Pass back as updated_since to fetch only changes
+
+class ProfilingConfig(BaseModel):
+    enabled: bool
+    sample_rate: float = Field(1.0, ge=0, le=100)  # Percent of requests to profile
+
 class OrderStatusUpdate(BaseModel):
     status: str
 
 class JoinHalfOrder(BaseModel):
     session_id: str
+    restaurant_id: Optional[str] = None  # Lets the session lookup target a single shard
     table_id: str
     table_number: str
     customer_name: str
@@ -184,6 +265,186 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def check_restaurant_access(user: User, restaurant_id: str):
+    if user.role == "super_admin":
+        return
+    if user.role == "counter" and user.restaurant_id == restaurant_id:
+        return
+    raise HTTPException(status_code=403, detail="Not authorized for this restaurant")
+
+# ============ CACHE ============
+
+# In-process LRU cache for hot read paths (menus, restaurants), capped at CACHE_MAX_ENTRIES.
+# Every write bumps a version stamp for the key in cache_versions, and every read checks
+# the stamp (one indexed lookup) before using its local copy, so a write on any worker
+# is seen by all of them on their next read. CACHE_TTL_SECONDS only bounds how long an
+# unused entry holds memory. Misses and empty menus are never cached, so ids taken from
+# request paths cannot fill the cache with entries for restaurants that do not exist.
+_cache = OrderedDict()
+
+def cache_key_name(key: tuple) -> str:
+    return ":".join(key)
+
+async def cache_version(key: tuple) -> int:
+    doc = await db.cache_versions.find_one({"key": cache_key_name(key)}, {"_id": 0, "version": 1})
+    return doc["version"] if doc else 0
+
+def cache_get(key: tuple, version: int):
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    expires_at, cached_version, value = entry
+    if time.monotonic() > expires_at or cached_version != version:
+        _cache.pop(key, None)
+        return None
+    _cache.move_to_end(key)
+    return value
+
+def cache_set(key: tuple, version: int, value):
+    _cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, version, value)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+async def cache_invalidate(key: tuple):
+    _cache.pop(key, None)
+    await db.cache_versions.update_one({"key": cache_key_name(key)}, {"$inc": {"version": 1}}, upsert=True)
+
+def sweep_cache() -> int:
+    now = time.monotonic()
+    expired = [key for key, (expires_at, _, _) in _cache.items() if now > expires_at]
+    for key in expired:
+        _cache.pop(key, None)
+    return len(expired)
+
+async def sweep_cache_periodically():
+    while True:
+        await asyncio.sleep(CACHE_TTL_SECONDS)
+        sweep_cache()
+
+async def load_restaurant(restaurant_id: str) -> Optional[Restaurant]:
+    key = ("restaurant", restaurant_id)
+    # Read the stamp before the data: a write racing this load then leaves the entry
+    # one version behind, so the next read reloads instead of keeping stale data.
+    version = await cache_version(key)
+    restaurant = cache_get(key, version)
+    if restaurant is None:
+        doc = await db.restaurants.find_one({"id": restaurant_id})
+        if not doc:
+            return None
+        restaurant = Restaurant(**doc)
+        cache_set(key, version, restaurant)
+    return restaurant
+
+async def load_menu_items(restaurant_id: str) -> List[MenuItem]:
+    key = ("menu", restaurant_id)
+    version = await cache_version(key)
+    items = cache_get(key, version)
+    if items is None:
+        docs = await db.menu_items.find({"restaurant_id": restaurant_id}).to_list(1000)
+        items = [MenuItem(**item) for item in docs]
+        if items:
+            cache_set(key, version, items)
+    return items
+
+# ============ DATA ACCESS ============
+
+# customer_orders is a compact per-customer index of orders, keyed by a keyed hash of
+# the mobile number so raw numbers never appear in it. It mirrors the fields the
+# customer order screen shows and is kept in sync by insert_order/update_order_fields.
+# Orders from before it existed are filled in by backfill_customer_orders.py.
+
+def customer_mobile_hash(mobile: str) -> str:
+    digits = "".join(c for c in mobile if c.isdigit())
+    return hmac.new(CUSTOMER_HASH_KEY, digits.encode(), hashlib.sha256).hexdigest()
+
+def as_utc_datetime(value) -> datetime:
+    # orders hold a mix of BSON dates and isoformat strings in created_at/updated_at
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def customer_order_summary(order: dict, updated_at: Optional[datetime] = None) -> dict:
+    return {
+        "mobile_hash": customer_mobile_hash(order["customer_mobile"]),
+        "order_id": order["id"],
+        "restaurant_id": order["restaurant_id"],
+        "table_number": order["table_number"],
+        "items": order["items"],
+        "total_amount": order["total_amount"],
+        "status": order["status"],
+        "matched_table_number": order.get("matched_table_number"),
+        "created_at": as_utc_datetime(order["created_at"]),
+        "updated_at": updated_at or as_utc_datetime(order["updated_at"])
+    }
+
+# Restaurant-owned collections (tables, menu_items, orders, half_order_sessions) are
+# sharded on {restaurant_id, id} (see SHARD_KEYS). Going through these helpers keeps
+# restaurant_id in every filter so mongos can route each query to a single shard.
+
+def scoped(restaurant_id: str, **filters) -> dict:
+    return {"restaurant_id": restaurant_id, **filters}
+
+async def find_table(restaurant_id: str, table_id: str) -> Optional[dict]:
+    return await db.tables.find_one(scoped(restaurant_id, id=table_id))
+
+async def find_menu_item(restaurant_id: str, item_id: str) -> Optional[dict]:
+    return await db.menu_items.find_one(scoped(restaurant_id, id=item_id))
+
+async def update_menu_item_fields(restaurant_id: str, item_id: str, fields: dict) -> bool:
+    result = await db.menu_items.update_one(scoped(restaurant_id, id=item_id), {"$set": fields})
+    await cache_invalidate(("menu", restaurant_id))
+    return result.matched_count > 0
+
+async def remove_menu_item(restaurant_id: str, item_id: str) -> bool:
+    result = await db.menu_items.delete_one(scoped(restaurant_id, id=item_id))
+    await cache_invalidate(("menu", restaurant_id))
+    return result.deleted_count > 0
+
+async def find_order(restaurant_id: str, order_id: str) -> Optional[dict]:
+    return await db.orders.find_one(scoped(restaurant_id, id=order_id))
+
+async def insert_order(order: Order):
+    await db.orders.insert_one(order.dict())
+    await db.customer_orders.insert_one(customer_order_summary(order.dict()))
+
+async def update_order_fields(restaurant_id: str, order_id: str, fields: dict, **filters) -> bool:
+    now = datetime.now(timezone.utc)
+    order = await db.orders.find_one_and_update(
+        scoped(restaurant_id, id=order_id, **filters),
+        {"$set": {**fields, "updated_at": now.isoformat()}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not order:
+        return False
+    # Rewrite the whole summary (upserting) so orders that predate customer_orders
+    # pick up an entry on their next change, and a concurrent backfill can't leave
+    # a stale one behind.
+    summary = customer_order_summary(order, updated_at=now)
+    await db.customer_orders.update_one(
+        {"mobile_hash": summary["mobile_hash"], "order_id": order_id},
+        {"$set": summary},
+        upsert=True
+    )
+    return True
+
+async def find_half_order_session(restaurant_id: str, session_id: str) -> Optional[dict]:
+    return await db.half_order_sessions.find_one(scoped(restaurant_id, id=session_id))
+
+async def set_half_order_session_status(restaurant_id: str, session_id: str, new_status: str):
+    await db.half_order_sessions.update_one(scoped(restaurant_id, id=session_id), {"$set": {"status": new_status}})
+
+async def resolve_restaurant_id(collection: str, doc_id: str, current_user: User) -> Optional[str]:
+    # Legacy id-only routes: counters are pinned to their own restaurant, so only
+    # super admins pay for an untargeted lookup.
+    if current_user.role == "counter":
+        return current_user.restaurant_id
+    doc = await db[collection].find_one({"id": doc_id}, {"restaurant_id": 1})
+    return doc["restaurant_id"] if doc else None
+
 # ============ AUTH ROUTES ============
 
 @api_router.post("/auth/register")
@@ -238,10 +499,10 @@ async def get_restaurants():
 
 @api_router.get("/restaurants/{restaurant_id}", response_model=Restaurant)
 async def get_restaurant(restaurant_id: str):
-    restaurant = await db.restaurants.find_one({"id": restaurant_id})
+    restaurant = await load_restaurant(restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    return Restaurant(**restaurant)
+    return restaurant
 
 @api_router.delete("/restaurants/{restaurant_id}")
 async def delete_restaurant(restaurant_id: str, current_user: User = Depends(get_current_user)):
@@ -249,6 +510,7 @@ async def delete_restaurant(restaurant_id: str, current_user: User = Depends(get
         raise HTTPException(status_code=403, detail="Only super admin can delete restaurants")
     
     result = await db.restaurants.delete_one({"id": restaurant_id})
+    await cache_invalidate(("restaurant", restaurant_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     return {"message": "Restaurant deleted successfully"}
@@ -259,6 +521,7 @@ async def delete_restaurant(restaurant_id: str, current_user: User = Depends(get
 async def create_table(table_data: TableCreate, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["super_admin", "counter"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
+    check_restaurant_access(current_user, table_data.restaurant_id)
     
     table = Table(**table_data.dict())
     # Generate QR URL
@@ -273,8 +536,16 @@ async def get_tables_by_restaurant(restaurant_id: str):
     tables = await db.tables.find({"restaurant_id": restaurant_id}).to_list(1000)
     return [Table(**t) for t in tables]
 
+@api_router.get("/restaurants/{restaurant_id}/tables/{table_id}", response_model=Table)
+async def get_restaurant_table(restaurant_id: str, table_id: str):
+    table = await find_table(restaurant_id, table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    return Table(**table)
+
 @api_router.get("/tables/{table_id}", response_model=Table)
 async def get_table(table_id: str):
+    # Legacy id-only lookup (scatter-gather when sharded); prefer the restaurant-scoped route
     table = await db.tables.find_one({"id": table_id})
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
@@ -286,44 +557,72 @@ async def get_table(table_id: str):
 async def create_menu_item(item_data: MenuItemCreate, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["super_admin", "counter"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
+    check_restaurant_access(current_user, item_data.restaurant_id)
     
     menu_item = MenuItem(**item_data.dict())
     await db.menu_items.insert_one(menu_item.dict())
+    await cache_invalidate(("menu", menu_item.restaurant_id))
     return menu_item
 
 @api_router.get("/menu-items/restaurant/{restaurant_id}", response_model=List[MenuItem])
 async def get_menu_items(restaurant_id: str):
-    items = await db.menu_items.find({"restaurant_id": restaurant_id}).to_list(1000)
-    return [MenuItem(**item) for item in items]
+    return await load_menu_items(restaurant_id)
 
-@api_router.patch("/menu-items/{item_id}")
-async def update_menu_item(item_id: str, update_data: MenuItemUpdate, current_user: User = Depends(get_current_user)):
+@api_router.patch("/restaurants/{restaurant_id}/menu-items/{item_id}")
+async def update_restaurant_menu_item(restaurant_id: str, item_id: str, update_data: MenuItemUpdate, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["super_admin", "counter"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
+    check_restaurant_access(current_user, restaurant_id)
     
     update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
     if not update_dict:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await db.menu_items.update_one({"id": item_id}, {"$set": update_dict})
-    if result.matched_count == 0:
+    if not await update_menu_item_fields(restaurant_id, item_id, update_dict):
         raise HTTPException(status_code=404, detail="Menu item not found")
     return {"message": "Menu item updated successfully"}
 
+@api_router.delete("/restaurants/{restaurant_id}/menu-items/{item_id}")
+async def delete_restaurant_menu_item(restaurant_id: str, item_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["super_admin", "counter"]:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    check_restaurant_access(current_user, restaurant_id)
+    
+    if not await remove_menu_item(restaurant_id, item_id):
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    return {"message": "Menu item deleted successfully"}
+
+@api_router.patch("/menu-items/{item_id}")
+async def update_menu_item(item_id: str, update_data: MenuItemUpdate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["super_admin", "counter"]:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    restaurant_id = await resolve_restaurant_id("menu_items", item_id, current_user)
+    if restaurant_id is None:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    return await update_restaurant_menu_item(restaurant_id, item_id, update_data, current_user)
+
 @api_router.delete("/menu-items/{item_id}")
 async def delete_menu_item(item_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["super_admin", "counter"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    result = await db.menu_items.delete_one({"id": item_id})
-    if result.deleted_count == 0:
+    restaurant_id = await resolve_restaurant_id("menu_items", item_id, current_user)
+    if restaurant_id is None:
         raise HTTPException(status_code=404, detail="Menu item not found")
-    return {"message": "Menu item deleted successfully"}
+    return await delete_restaurant_menu_item(restaurant_id, item_id, current_user)
 
 # ============ ORDER ROUTES ============
 
 @api_router.post("/orders", response_model=Order)
 async def create_order(order_data: OrderCreate):
+    if not order_data.items:
+        raise HTTPException(status_code=400, detail="Order must contain at least one item")
+    if not await load_restaurant(order_data.restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    if not await find_table(order_data.restaurant_id, order_data.table_id):
+        raise HTTPException(status_code=404, detail="Table not found")
+    
     # Calculate total and check for half orders
     total_amount = sum(item["price"] for item in order_data.items)
     is_half_order = any(item.get("portion") == "half" for item in order_data.items)
@@ -357,13 +656,16 @@ async def create_order(order_data: OrderCreate):
                 await db.half_order_sessions.insert_one(session.dict())
                 order.session_id = session.id
     
-    await db.orders.insert_one(order.dict())
+    await insert_order(order)
     return order
 
 @api_router.post("/orders/join-half")
 async def join_half_order(join_data: JoinHalfOrder):
     # Find the session
-    session = await db.half_order_sessions.find_one({"id": join_data.session_id})
+    if join_data.restaurant_id:
+        session = await find_half_order_session(join_data.restaurant_id, join_data.session_id)
+    else:
+        session = await db.half_order_sessions.find_one({"id": join_data.session_id})
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -371,22 +673,19 @@ async def join_half_order(join_data: JoinHalfOrder):
     
     # Check if session is expired
     if datetime.now(timezone.utc) > session_obj.expires_at:
-        await db.half_order_sessions.update_one(
-            {"id": join_data.session_id},
-            {"$set": {"status": "EXPIRED"}}
-        )
+        await set_half_order_session_status(session_obj.restaurant_id, join_data.session_id, "EXPIRED")
         raise HTTPException(status_code=400, detail="Session expired")
     
     if session_obj.status != "ACTIVE":
         raise HTTPException(status_code=400, detail="Session not active")
     
     # Get original order
-    original_order = await db.orders.find_one({"id": session_obj.order_id})
+    original_order = await find_order(session_obj.restaurant_id, session_obj.order_id)
     if not original_order:
         raise HTTPException(status_code=404, detail="Original order not found")
     
     # Create new order for joining customer
-    menu_item = await db.menu_items.find_one({"id": session_obj.menu_item_id})
+    menu_item = await find_menu_item(session_obj.restaurant_id, session_obj.menu_item_id)
     if not menu_item:
         raise HTTPException(status_code=404, detail="Menu item not found")
     
@@ -411,24 +710,17 @@ async def join_half_order(join_data: JoinHalfOrder):
         matched_table_number=session_obj.table_number
     )
     
-    await db.orders.insert_one(new_order.dict())
+    await insert_order(new_order)
     
     # Update original order
-    await db.orders.update_one(
-        {"id": session_obj.order_id},
-        {"$set": {
-            "status": "MATCHED",
-            "matched_order_id": new_order.id,
-            "matched_table_number": join_data.table_number,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    await update_order_fields(session_obj.restaurant_id, session_obj.order_id, {
+        "status": "MATCHED",
+        "matched_order_id": new_order.id,
+        "matched_table_number": join_data.table_number
+    })
     
     # Update session
-    await db.half_order_sessions.update_one(
-        {"id": join_data.session_id},
-        {"$set": {"status": "MATCHED"}}
-    )
+    await set_half_order_session_status(session_obj.restaurant_id, join_data.session_id, "MATCHED")
     
     return {"message": "Successfully joined half order", "order_id": new_order.id}
 
@@ -445,8 +737,44 @@ async def get_customer_orders(customer_mobile: str, restaurant_id: str):
     }).sort("created_at", -1).to_list(1000)
     return [Order(**order) for order in orders]
 
+@api_router.get("/restaurants/{restaurant_id}/orders/{order_id}", response_model=Order)
+async def get_restaurant_order(restaurant_id: str, order_id: str):
+    order = await find_order(restaurant_id, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return Order(**order)
+
+@api_router.patch("/restaurants/{restaurant_id}/orders/{order_id}/status")
+async def update_restaurant_order_status(restaurant_id: str, order_id: str, status_update: OrderStatusUpdate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["super_admin", "counter"]:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    check_restaurant_access(current_user, restaurant_id)
+    
+    if not await update_order_fields(restaurant_id, order_id, {"status": status_update.status}):
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    return {"message": "Order status updated successfully"}
+
+async def find_customer_orders(mobile_hash: str, restaurant_id: str, updated_since: Optional[datetime], limit: int) -> CustomerOrderHistory:
+    # Deltas overlap by CUSTOMER_DELTA_OVERLAP so writes stamped before a poll but landing
+    # after it are sent again next time; clients merge by id, so repeats are harmless.
+    server_time = datetime.now(timezone.utc)
+    query = {"mobile_hash": mobile_hash, "restaurant_id": restaurant_id}
+    if updated_since is not None:
+        query["updated_at"] = {"$gt": updated_since - CUSTOMER_DELTA_OVERLAP}
+    docs = await db.customer_orders.find(query, {"_id": 0, "mobile_hash": 0}).sort("created_at", -1).to_list(limit)
+    return CustomerOrderHistory(
+        orders=[CustomerOrderSummary(id=doc.pop("order_id"), **doc) for doc in docs],
+        server_time=server_time
+    )
+
+@api_router.get("/customers/{customer_mobile}/restaurants/{restaurant_id}/orders", response_model=CustomerOrderHistory)
+async def get_customer_order_history(customer_mobile: str, restaurant_id: str, updated_since: Optional[datetime] = None, limit: int = Query(50, ge=1, le=200)):
+    return await find_customer_orders(customer_mobile_hash(customer_mobile), restaurant_id, updated_since, limit)
+
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str):
+    # Legacy id-only lookup (scatter-gather when sharded); prefer the restaurant-scoped route
     order = await db.orders.find_one({"id": order_id})
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -457,15 +785,10 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, c
     if current_user.role not in ["super_admin", "counter"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    result = await db.orders.update_one(
-        {"id": order_id},
-        {"$set": {"status": status_update.status, "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
-    
-    if result.matched_count == 0:
+    restaurant_id = await resolve_restaurant_id("orders", order_id, current_user)
+    if restaurant_id is None:
         raise HTTPException(status_code=404, detail="Order not found")
-    
-    return {"message": "Order status updated successfully"}
+    return await update_restaurant_order_status(restaurant_id, order_id, status_update, current_user)
 
 # ============ HALF ORDER SESSION ROUTES ============
 
@@ -490,10 +813,7 @@ async def get_active_half_order_sessions(restaurant_id: str):
     }).to_list(1000)
     
     for session in expired_sessions:
-        await db.orders.update_one(
-            {"id": session["order_id"], "status": "OPEN"},
-            {"$set": {"status": "EXPIRED", "updated_at": datetime.now(timezone.utc).isoformat()}}
-        )
+        await update_order_fields(restaurant_id, session["order_id"], {"status": "EXPIRED"}, status="OPEN")
     
     # Return active sessions
     sessions = await db.half_order_sessions.find({
@@ -509,6 +829,7 @@ async def get_active_half_order_sessions(restaurant_id: str):
 async def get_analytics(restaurant_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["super_admin", "counter"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
+    check_restaurant_access(current_user, restaurant_id)
     
     # Total orders
     total_orders = await db.orders.count_documents({"restaurant_id": restaurant_id})
@@ -536,9 +857,222 @@ async def get_analytics(restaurant_id: str, current_user: User = Depends(get_cur
         "active_half_order_sessions": active_sessions
     }
 
+# ============ PROFILING ROUTES ============
+
+def require_super_admin(user: User):
+    if user.role != "super_admin":
+        raise HTTPException(status_code=403, detail="Only super admin can manage profiling")
+
+@api_router.get("/admin/profiling")
+async def get_profiling(current_user: User = Depends(get_current_user)):
+    require_super_admin(current_user)
+    return {
+        "enabled": profiling_settings.enabled,
+        "sample_rate": profiling_settings.sample_rate,
+        "profiles": len(list_profiles(profiling_settings)),
+        "loop_monitor": loop_monitor.stats() if loop_monitor is not None else None
+    }
+
+@api_router.put("/admin/profiling")
+async def update_profiling(config: ProfilingConfig, current_user: User = Depends(get_current_user)):
+    require_super_admin(current_user)
+    if config.enabled and importlib.util.find_spec("pyinstrument") is None:
+        raise HTTPException(status_code=400, detail="pyinstrument is not installed")
+    
+    # Persisted so every worker picks it up on its next sync_profiling_settings() pass
+    await db.runtime_settings.update_one(
+        {"id": "profiling"},
+        {"$set": {"enabled": config.enabled, "sample_rate": config.sample_rate}},
+        upsert=True
+    )
+    profiling_settings.enabled = config.enabled
+    profiling_settings.sample_rate = config.sample_rate
+    return {"message": "Profiling settings updated successfully"}
+
+@api_router.get("/admin/profiling/profiles")
+async def get_profiles(current_user: User = Depends(get_current_user)):
+    require_super_admin(current_user)
+    return list_profiles(profiling_settings)
+
+@api_router.get("/admin/profiling/profiles/{name}")
+async def download_profile(name: str, current_user: User = Depends(get_current_user)):
+    require_super_admin(current_user)
+    path = profiling_settings.output_dir / name
+    if path.parent != profiling_settings.output_dir or not name.endswith(".speedscope.json") or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    # Open in https://www.speedscope.app for a flame graph
+    return FileResponse(path, media_type="application/json", filename=name)
+
+# ============ STARTUP & HEALTH ============
+
+# Shard-key / index layout
+# users, restaurants and cache_versions are small and stay unsharded on the primary shard.
+# users and restaurants are small and stay unsharded on the primary shard.
+# customer_orders is sharded on {mobile_hash: 1, order_id: 1} so a customer's history
+# lives on a single shard.
+# Every restaurant-owned collection is range-sharded on {restaurant_id: 1, id: 1}:
+#   - restaurant_id leads, so per-restaurant queries (menus, order lists, analytics,
+#     the scoped /restaurants/{restaurant_id}/... routes) target one shard instead of
+#     scatter-gathering;
+#   - id is appended for cardinality, so a very busy restaurant can still be split
+#     into several chunks, and it makes (restaurant_id, id) unique per collection.
+# A sharded collection cannot have a unique index that isn't prefixed by the shard key,
+# so the global {id: 1} index is non-unique and only serves the legacy id-only routes.
+# Secondary indexes all lead with restaurant_id for the same reason.
+SHARD_KEYS = {
+    "tables": {"restaurant_id": 1, "id": 1},
+    "menu_items": {"restaurant_id": 1, "id": 1},
+    "orders": {"restaurant_id": 1, "id": 1},
+    "half_order_sessions": {"restaurant_id": 1, "id": 1},
+    "customer_orders": {"mobile_hash": 1, "order_id": 1},
+}
+
+INDEXES = {
+    "users": [IndexModel([("username", ASCENDING)], unique=True)],
+    "restaurants": [IndexModel([("id", ASCENDING)], unique=True)],
+    "tables": [
+        IndexModel([("restaurant_id", ASCENDING), ("id", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)]),
+    ],
+    "menu_items": [
+        IndexModel([("restaurant_id", ASCENDING), ("id", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)]),
+    ],
+    "orders": [
+        IndexModel([("restaurant_id", ASCENDING), ("id", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("restaurant_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("restaurant_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("restaurant_id", ASCENDING), ("customer_mobile", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "half_order_sessions": [
+        IndexModel([("restaurant_id", ASCENDING), ("id", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("restaurant_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "customer_orders": [
+        IndexModel([("mobile_hash", ASCENDING), ("order_id", ASCENDING)], unique=True),
+        IndexModel([("mobile_hash", ASCENDING), ("restaurant_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "cache_versions": [IndexModel([("key", ASCENDING)], unique=True)],
+}
+
+async def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. an index with the same key but different options from an older layout, or
+            # duplicates blocking a new unique index; keep serving and let an operator run
+            # migrate_indexes.py.
+            logger.warning(f"Could not create indexes on {collection}: {e}")
+
+async def shard_collections():
+    # Opt-in (MONGO_SHARDING=true): only valid when connected to a mongos.
+    await client.admin.command("enableSharding", db.name)
+    for collection, key in SHARD_KEYS.items():
+        try:
+            await client.admin.command("shardCollection", f"{db.name}.{collection}", key=key)
+        except OperationFailure as e:
+            logger.warning(f"Could not shard {collection}: {e}")
+
+async def wait_for_db():
+    while True:
+        try:
+            await db.command("ping")
+            return
+        except Exception as e:
+            logger.warning(f"MongoDB not reachable yet ({e}); retrying in {STARTUP_RETRY_SECONDS}s")
+            await asyncio.sleep(STARTUP_RETRY_SECONDS)
+
+async def warm_pool():
+    # Concurrent pings force the driver to open up to MONGO_MIN_POOL_SIZE connections now
+    # instead of on the first burst of real traffic.
+    await asyncio.gather(*(db.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)))
+
+async def warm_caches():
+    # "Active" restaurants are those with orders still in flight; fall back to all restaurants
+    # (e.g. right after a fresh seed) so the menu pages are hot either way.
+    restaurant_ids = await db.orders.distinct(
+        "restaurant_id", {"status": {"$in": ["OPEN", "MATCHED", "PREPARING"]}}
+    )
+    if not restaurant_ids:
+        restaurants = await db.restaurants.find({}, {"id": 1}).to_list(WARMUP_RESTAURANT_LIMIT)
+        restaurant_ids = [r["id"] for r in restaurants]
+    restaurant_ids = restaurant_ids[:WARMUP_RESTAURANT_LIMIT]
+
+    async def warm_restaurant(restaurant_id: str) -> bool:
+        try:
+            await load_restaurant(restaurant_id)
+            await load_menu_items(restaurant_id)
+            return True
+        except Exception:
+            logger.warning(f"Could not warm caches for restaurant {restaurant_id}", exc_info=True)
+            return False
+
+    results = await asyncio.gather(*(warm_restaurant(rid) for rid in restaurant_ids), return_exceptions=True)
+    return sum(result is True for result in results)
+
+async def warm_up(app: FastAPI):
+    started = time.perf_counter()
+    # Readiness only depends on Mongo being reachable; wait_for_db retries until it is.
+    await wait_for_db()
+    app.state.ready = True
+
+    # Missing indexes, a cold pool or a cold cache only cost latency, so the rest is
+    # best-effort. Index migrations on existing data belong in migrate_indexes.py.
+    warmed = 0
+    try:
+        await ensure_indexes()
+        if MONGO_SHARDING:
+            await shard_collections()
+        await warm_pool()
+        warmed = await warm_caches()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Index / connection pool / cache warm-up failed; serving cold")
+    logger.info(f"Startup warm-up done in {time.perf_counter() - started:.2f}s ({warmed} restaurants cached)")
+
+async def sync_profiling_settings():
+    while True:
+        try:
+            doc = await db.runtime_settings.find_one({"id": "profiling"})
+            if doc:
+                profiling_settings.enabled = doc.get("enabled", False)
+                profiling_settings.sample_rate = doc.get("sample_rate", 0.0)
+        except Exception as e:
+            logger.debug(f"Could not sync profiling settings: {e}")
+        await asyncio.sleep(PROFILING_SYNC_SECONDS)
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    checks = {}
+    ready = app.state.ready
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=2)
+        checks["mongodb"] = {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        ready = False
+        checks["mongodb"] = {"status": "error", "error": str(e) or type(e).__name__}
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "warmed_up": app.state.ready,
+        "cache_entries": len(_cache),
+        "checks": checks,
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(ProfilingMiddleware, settings=profiling_settings)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -553,7 +1087,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -165,7 +165,7 @@ const AdminDashboard = ({ auth }) => {
   const deleteMenuItem = async (id) => {
     if (!window.confirm('Are you sure you want to delete this menu item?')) return;
     try {
-      await axios.delete(`${API}/menu-items/${id}`, config);
+      await axios.delete(`${API}/restaurants/${selectedRestaurant}/menu-items/${id}`, config);
       fetchMenuItems();
       alert('Menu item deleted successfully!');
     } catch (err) {
@@ -175,7 +175,7 @@ const AdminDashboard = ({ auth }) => {
 
   const toggleMenuItemAvailability = async (id, currentStatus) => {
     try {
-      await axios.patch(`${API}/menu-items/${id}`, { is_available: !currentStatus }, config);
+      await axios.patch(`${API}/restaurants/${selectedRestaurant}/menu-items/${id}`, { is_available: !currentStatus }, config);
       fetchMenuItems();
     } catch (err) {
       alert('Error updating menu item');
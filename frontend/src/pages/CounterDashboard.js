@@ -56,7 +56,7 @@ const CounterDashboard = ({ auth }) => {
   const updateOrderStatus = async (orderId, newStatus) => {
     setLoading(true);
     try {
-      await axios.patch(`${API}/orders/${orderId}/status`, { status: newStatus }, config);
+      await axios.patch(`${API}/restaurants/${selectedRestaurant}/orders/${orderId}/status`, { status: newStatus }, config);
       fetchOrders();
     } catch (err) {
       alert('Error updating order status');
@@ -29,7 +29,7 @@ const CustomerMenu = () => {
     try {
       const [restRes, tableRes, menuRes] = await Promise.all([
         axios.get(`${API}/restaurants/${restaurantId}`),
-        axios.get(`${API}/tables/${tableId}`),
+        axios.get(`${API}/restaurants/${restaurantId}/tables/${tableId}`),
         axios.get(`${API}/menu-items/restaurant/${restaurantId}`)
       ]);
       
@@ -111,6 +111,7 @@ const CustomerMenu = () => {
     try {
       await axios.post(`${API}/orders/join-half`, {
         session_id: session.id,
+        restaurant_id: restaurantId,
         table_id: tableId,
         table_number: table.table_number,
         customer_name: customerName,
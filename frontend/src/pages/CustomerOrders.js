@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { API } from '../App';
@@ -10,6 +10,7 @@ const CustomerOrders = () => {
   const [orders, setOrders] = useState([]);
   const [restaurant, setRestaurant] = useState(null);
   const [loading, setLoading] = useState(true);
+  const lastSync = useRef(null);
 
   useEffect(() => {
     fetchData();
@@ -18,15 +19,24 @@ const CustomerOrders = () => {
     return () => clearInterval(interval);
   }, []);
 
+  const historyUrl = `${API}/customers/${mobile}/restaurants/${restaurantId}/orders`;
+
   const fetchData = async () => {
     try {
       const [restRes, ordersRes] = await Promise.all([
         axios.get(`${API}/restaurants/${restaurantId}`),
-        axios.get(`${API}/orders/customer/${mobile}/${restaurantId}`)
+        axios.get(historyUrl)
       ]);
       
       setRestaurant(restRes.data);
-      setOrders(ordersRes.data);
+      lastSync.current = ordersRes.data.server_time;
+      if (ordersRes.data.orders.length > 0) {
+        setOrders(ordersRes.data.orders);
+      } else {
+        // Orders placed before the history index was backfilled are only in the legacy list
+        const legacyRes = await axios.get(`${API}/orders/customer/${mobile}/${restaurantId}`);
+        setOrders(legacyRes.data);
+      }
       setLoading(false);
     } catch (err) {
       console.error('Error fetching data:', err);
@@ -35,10 +45,19 @@ const CustomerOrders = () => {
     }
   };
 
+  // Poll only for orders changed since the last response and merge them in
   const fetchOrders = async () => {
     try {
-      const res = await axios.get(`${API}/orders/customer/${mobile}/${restaurantId}`);
-      setOrders(res.data);
+      const params = lastSync.current ? { updated_since: lastSync.current } : {};
+      const res = await axios.get(historyUrl, { params });
+      const changed = res.data.orders;
+      lastSync.current = res.data.server_time;
+      if (changed.length === 0) return;
+      setOrders(prev => {
+        const changedIds = new Set(changed.map(o => o.id));
+        return [...changed, ...prev.filter(o => !changedIds.has(o.id))]
+          .sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+      });
     } catch (err) {
       console.error('Error fetching orders:', err);
     }
@@ -130,7 +149,7 @@ const CustomerOrders = () => {
                 {getStatusMessage(order.status)}
               </div>
 
-              {order.matched_order_id && (
+              {order.matched_table_number && (
                 <div style={styles.matchedInfo}>
                   🤝 Matched with Table {order.matched_table_number}
                 </div>